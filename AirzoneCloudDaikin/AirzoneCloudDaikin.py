@@ -13,6 +13,7 @@ from .contants import (
     API_EVENTS,
 )
 from .Installation import Installation
+from .Fleet import Fleet
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -27,6 +28,7 @@ class AirzoneCloudDaikin:
     _user_agent = "Mozilla/5.0 (Linux; Android 6.0.1; Nexus 7 Build/MOB30X; wv) AppleWebKit/537.26 (KHTML, like Gecko) Version/4.0 Chrome/70.0.3538.110 Safari/537.36"
     _token = None
     _installations = []
+    _fleet = None
 
     def __init__(
         self, username, password, user_agent=None, base_url=None,
@@ -39,6 +41,8 @@ class AirzoneCloudDaikin:
             self._user_agent = user_agent
         if base_url is not None and isinstance(base_url, str):
             self._base_url = base_url
+        # devices indexes (filled while loading installations)
+        self._fleet = Fleet()
         # login
         self._login()
         # load installations
@@ -62,6 +66,11 @@ class AirzoneCloudDaikin:
                 result.append(device)
         return result
 
+    @property
+    def fleet(self):
+        """Get fleet to query & aggregate all devices through indexes"""
+        return self._fleet
+
     #
     # Refresh
     #
@@ -110,6 +119,10 @@ class AirzoneCloudDaikin:
                 if installation is None:
                     installation = Installation(self, installation_data)
                 self._installations.append(installation)
+            # remove devices of deleted installations from fleet indexes
+            self._fleet._remove_installations(
+                [installation.id for installation in self._installations]
+            )
         except RuntimeError:
             raise Exception("Unable to load installations from AirzoneCloud")
         return self._installations
@@ -0,0 +1,399 @@
+#!/usr/bin/python3
+
+import argparse
+import hmac
+import ipaddress
+import json
+import logging
+import socket
+import socketserver
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from .contants import (
+    API_INSTALLATION_RELATIONS,
+    API_DEVICES,
+    API_EVENTS,
+    DAEMON_SECRET_HEADER,
+)
+from .AirzoneCloudDaikin import AirzoneCloudDaikin
+
+_LOGGER = logging.getLogger(__name__)
+
+# device data field updated by each event option (see Device setters)
+EVENTS_OPTIONS_FIELDS = {
+    "P1": "power",
+    "P2": "mode",
+    "P3": "cold_speed",
+    "P4": "heat_speed",
+    "P7": "cold_consign",
+    "P8": "heat_consign",
+    "P9": "ver_cold_slats",
+    "P10": "ver_heat_slats",
+    "P19": "hor_cold_slats",
+    "P20": "hor_heat_slats",
+}
+
+
+class AirzoneCloudDaikinDaemon:
+    """Share one AirzoneCloudDaikin session per account with local clients (see AirzoneCloudDaikinProxy)"""
+
+    _accounts = {}
+    _secret = None
+    _host = "127.0.0.1"
+    _port = 8765
+    _refresh_interval = 60
+    _server = None
+    _scheduler = None
+    _stop = None
+
+    def __init__(
+        self,
+        accounts,
+        secret,
+        host=None,
+        port=None,
+        refresh_interval=None,
+        user_agent=None,
+        base_url=None,
+    ):
+        """
+        Login to each account : accounts = { username: password, ... }
+        Local clients must send the same secret (see AirzoneCloudDaikinProxy)
+        """
+        if not secret or not isinstance(secret, str):
+            raise ValueError("a secret is required to authenticate local clients")
+        self._secret = secret
+        if host is not None:
+            self._host = host
+        if not self._is_loopback(self._host):
+            raise ValueError(
+                'host "{}" is not a loopback address, daemon only serves local clients'.format(
+                    self._host
+                )
+            )
+        if port is not None:
+            self._port = int(port)
+        if refresh_interval is not None:
+            self._refresh_interval = int(refresh_interval)
+        self._stop = threading.Event()
+
+        # one logged-in client per account & a cache of its data
+        # (cache is replaced as a whole under lock, never modified in place)
+        self._accounts = {}
+        for username, password in accounts.items():
+            api = AirzoneCloudDaikin(
+                username, password, user_agent=user_agent, base_url=base_url
+            )
+            account = {
+                "api": api,
+                "lock": threading.Lock(),
+                "update_asked": {},
+                "installations": [],
+                "devices": {},
+            }
+            self._set_cache(
+                account,
+                [installation._data for installation in api.installations],
+                {
+                    installation.id: [device._data for device in installation.devices]
+                    for installation in api.installations
+                },
+            )
+            self._accounts[username] = account
+
+    def __str__(self):
+        return "AirzoneCloudDaikinDaemon(url={}, accounts={})".format(
+            self.url, len(self._accounts)
+        )
+
+    #
+    # getters
+    #
+
+    @property
+    def url(self):
+        """Get url to give to AirzoneCloudDaikinProxy"""
+        return "http://{}:{}".format(self._host, self._port)
+
+    @property
+    def refresh_interval(self):
+        """Get interval in seconds between two refresh of all accounts"""
+        return self._refresh_interval
+
+    #
+    # server
+    #
+
+    def serve_forever(self):
+        """Start refresh scheduler & serve local clients until shutdown()"""
+        self._stop.clear()
+        self._scheduler = threading.Thread(target=self._run_scheduler, daemon=True)
+        self._scheduler.start()
+
+        self._server = _ThreadingHTTPServer((self._host, self._port), _RequestHandler)
+        self._server.airzone_daemon = self
+        _LOGGER.info("Serving {}".format(self))
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def shutdown(self):
+        """Stop serving local clients & refresh scheduler"""
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+
+    def refresh(self):
+        """Refresh installations & devices of all accounts, then ask airzone to update devices data"""
+        for username, account in self._accounts.items():
+            # load all data before replacing cache (keep last data on error)
+            try:
+                api = account["api"]
+                installations = [
+                    installation_relation.get("installation")
+                    for installation_relation in api._get_installation_relations()
+                ]
+                devices = {
+                    installation.get("id"): api._get_devices(installation.get("id"))
+                    for installation in installations
+                }
+            except Exception:
+                _LOGGER.exception("Unable to refresh account {}".format(username))
+                continue
+            with account["lock"]:
+                self._set_cache(account, installations, devices)
+            _LOGGER.debug("Account {} refreshed".format(username))
+
+            # data like current temperature will be available on next refresh
+            for device_id in list(account["device_installations"].keys()):
+                if self._stop.is_set():
+                    return
+                try:
+                    self._ask_update(account, device_id)
+                except Exception:
+                    _LOGGER.exception("Unable to ask update for {}".format(device_id))
+
+    #
+    # private
+    #
+
+    def _run_scheduler(self):
+        """Refresh all accounts every refresh_interval seconds"""
+        while not self._stop.wait(self._refresh_interval):
+            self.refresh()
+
+    @staticmethod
+    def _is_loopback(host):
+        """Check host is (or resolves to) a loopback address"""
+        try:
+            return ipaddress.ip_address(host).is_loopback
+        except ValueError:
+            pass
+        try:
+            return ipaddress.ip_address(socket.gethostbyname(host)).is_loopback
+        except (OSError, ValueError):
+            return False
+
+    def _check_secret(self, secret):
+        """Check secret sent by a local client"""
+        if secret is None or not hmac.compare_digest(
+            secret.encode("utf-8"), self._secret.encode("utf-8")
+        ):
+            raise _HttpError(401, "invalid secret")
+
+    def _set_cache(self, account, installations, devices):
+        """Replace cached data of an account (call with account lock, except on init)"""
+        account["installations"] = installations
+        account["devices"] = devices
+        account["device_installations"] = {
+            device.get("id"): installation_id
+            for installation_id, installation_devices in devices.items()
+            for device in installation_devices
+        }
+
+    def _ask_update(self, account, device_id):
+        """Ask airzone to update device data, at most once per refresh interval (call without account lock)"""
+        with account["lock"]:
+            last_update_asked = account["update_asked"].get(device_id)
+            if (
+                last_update_asked is not None
+                and time.monotonic() - last_update_asked < self._refresh_interval
+            ):
+                _LOGGER.debug("Update already asked for {}".format(device_id))
+                return False
+            account["update_asked"][device_id] = time.monotonic()
+
+        # same event as Device.ask_airzone_update()
+        payload = {
+            "event": {
+                "cgi": "modmaquina",
+                "device_id": device_id,
+                "option": "",
+                "value": "",
+            }
+        }
+        account["api"]._send_event(payload)
+        return True
+
+    def _get_account(self, username):
+        """Get account of a local client"""
+        account = self._accounts.get(username)
+        if account is None:
+            raise _HttpError(403, 'account "{}" not served'.format(username))
+        return account
+
+    def _get_installation_relations(self, username):
+        """Serve installations relations from cache"""
+        account = self._get_account(username)
+        with account["lock"]:
+            installations = account["installations"]
+        return {
+            "installation_relations": [
+                {"installation": installation} for installation in installations
+            ]
+        }
+
+    def _get_devices(self, username, installation_id):
+        """Serve devices of an installation from cache"""
+        account = self._get_account(username)
+        with account["lock"]:
+            devices = account["devices"].get(installation_id)
+        if devices is None:
+            raise _HttpError(
+                404, 'installation "{}" not found'.format(installation_id)
+            )
+        return {"devices": devices}
+
+    def _send_event(self, username, payload):
+        """Forward an event to AirzoneCloud and update cached device data"""
+        account = self._get_account(username)
+        if not isinstance(payload, dict) or not isinstance(payload.get("event"), dict):
+            raise _HttpError(400, "Invalid event payload")
+        event = payload["event"]
+        option = event.get("option")
+        device_id = event.get("device_id")
+        with account["lock"]:
+            known_device = device_id in account["device_installations"]
+        if not known_device:
+            raise _HttpError(404, 'device "{}" not found'.format(device_id))
+
+        # update asked (empty option) : forward only once per refresh interval
+        if not option:
+            self._ask_update(account, device_id)
+            return {}
+
+        result = account["api"]._send_event(payload)
+        if result is None:
+            raise _HttpError(502, "Unable to send event to AirzoneCloud")
+
+        # apply event on a copy of cached device until next refresh
+        field = EVENTS_OPTIONS_FIELDS.get(option)
+        if field is not None:
+            with account["lock"]:
+                installation_id = account["device_installations"].get(device_id)
+                if installation_id is not None:
+                    devices = account["devices"]
+                    installation_devices = []
+                    for device in devices[installation_id]:
+                        if device.get("id") == device_id:
+                            device = dict(device)
+                            device[field] = str(event.get("value"))
+                        installation_devices.append(device)
+                    devices = dict(devices)
+                    devices[installation_id] = installation_devices
+                    account["devices"] = devices
+        return result
+
+
+class _HttpError(Exception):
+    """Error returned to local client with an http status"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class _ThreadingHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    airzone_daemon = None
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """Serve AirzoneCloud api endpoints used by AirzoneCloudDaikinProxy"""
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def log_message(self, format, *args):
+        _LOGGER.debug("{} - {}".format(self.address_string(), format % args))
+
+    def _handle(self, method):
+        daemon = self.server.airzone_daemon
+        url = urllib.parse.urlparse(self.path)
+        endpoint = url.path.rstrip("/")
+        params = dict(urllib.parse.parse_qsl(url.query))
+        username = params.get("user_email")
+        try:
+            daemon._check_secret(self.headers.get(DAEMON_SECRET_HEADER))
+            if method == "GET" and endpoint == API_INSTALLATION_RELATIONS:
+                result = daemon._get_installation_relations(username)
+            elif method == "GET" and endpoint == API_DEVICES:
+                result = daemon._get_devices(username, params.get("installation_id"))
+            elif method == "POST" and endpoint == API_EVENTS:
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    payload = json.loads(self.rfile.read(length).decode("utf-8"))
+                except ValueError:
+                    raise _HttpError(400, "Invalid json payload") from None
+                result = daemon._send_event(username, payload)
+            else:
+                raise _HttpError(404, "{} {} not found".format(method, endpoint))
+            self._send_json(200, result)
+        except _HttpError as e:
+            self._send_json(e.status, {"error": str(e)})
+        except Exception as e:
+            _LOGGER.exception("Unable to serve {} {}".format(method, self.path))
+            self._send_json(500, {"error": str(e)})
+
+    def _send_json(self, status, data):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def main():
+    """Run daemon from a json config : { "accounts": { username: password }, "secret", "host", "port", "refresh_interval" }"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("config", help="path to json config file")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO)
+    with open(args.config) as config_file:
+        config = json.load(config_file)
+
+    daemon = AirzoneCloudDaikinDaemon(
+        config["accounts"],
+        config.get("secret"),
+        host=config.get("host"),
+        port=config.get("port"),
+        refresh_interval=config.get("refresh_interval"),
+    )
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        daemon.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+#!/usr/bin/python3
+
+import logging
+import urllib.parse
+
+from .contants import DAEMON_SECRET_HEADER
+from .AirzoneCloudDaikin import AirzoneCloudDaikin
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class AirzoneCloudDaikinProxy(AirzoneCloudDaikin):
+    """Same API as AirzoneCloudDaikin through a local AirzoneCloudDaikinDaemon (no cloud login)"""
+
+    _base_url = "http://127.0.0.1:8765"
+    _secret = None
+
+    def __init__(self, username, secret, url=None):
+        """Initialize connection to daemon for an account served by it (secret from daemon config)"""
+        self._secret = secret
+        super().__init__(username, None, base_url=url)
+
+    #
+    # private
+    #
+
+    def _login(self):
+        """Nothing to do : daemon is logged in to Daikin AirzoneCloud"""
+        _LOGGER.info("Using daemon {} as {}".format(self._base_url, self._username))
+        return None
+
+    def _request(
+        self, method, api_endpoint, params={}, headers={}, json=None, autoreconnect=True
+    ):
+        # generate url with account served by the daemon
+        params = dict(params)
+        params["user_email"] = self._username
+        url = "{}{}/?{}".format(
+            self._base_url, api_endpoint, urllib.parse.urlencode(params)
+        )
+
+        # authenticate to daemon
+        headers = {DAEMON_SECRET_HEADER: self._secret}
+
+        # make call
+        call = self._session.request(method=method, url=url, headers=headers, json=json)
+
+        # raise error if needed
+        call.raise_for_status()
+
+        return call.json()
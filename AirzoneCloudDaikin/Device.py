@@ -1,5 +1,5 @@
 import logging
-from .contants import MODES_CONVERTER
+from .contants import MODES_CONVERTER, SPEEDS, SLATS_POSITIONS, SLATS_SWING
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -10,11 +10,13 @@ class Device:
     _api = None
     _installation = {}
     _data = {}
+    _capabilities = {}
 
     def __init__(self, api, installation, data):
         self._api = api
         self._installation = installation
         self._data = data
+        self._load_capabilities()
 
         # log
         _LOGGER.info("Init {}".format(self.str_complete))
@@ -161,6 +163,38 @@ class Device:
             return float(self._data.get("max_limit_cold"))
         return None
 
+    @property
+    def speed(self):
+        """ Return device fan speed for current heat/cold mode """
+        if self.heat_cold_mode == "heat":
+            speed = self._data.get("heat_speed")
+        else:
+            speed = self._data.get("cold_speed")
+        if speed is not None:
+            return self._capabilities["speeds_from_raw"].get(str(speed), int(speed))
+        return None
+
+    @property
+    def vertical_slats(self):
+        """ Return device vertical slats position for current heat/cold mode (0 to 4 or "swing") """
+        if self.heat_cold_mode == "heat":
+            return self._slats_position(self._data.get("ver_heat_slats"))
+        else:
+            return self._slats_position(self._data.get("ver_cold_slats"))
+
+    @property
+    def horizontal_slats(self):
+        """ Return device horizontal slats position for current heat/cold mode (0 to 4 or "swing") """
+        if self.heat_cold_mode == "heat":
+            return self._slats_position(self._data.get("hor_heat_slats"))
+        else:
+            return self._slats_position(self._data.get("hor_cold_slats"))
+
+    @property
+    def time_zone(self):
+        """ Return device timezone """
+        return self._data.get("time_zone")
+
     @property
     def firmware(self):
         """ Return webserver firmware """
@@ -171,6 +205,51 @@ class Device:
         """ Return webserver brand """
         return self._data.get("brand")
 
+    #
+    # capabilities
+    #
+
+    @property
+    def supported_modes(self):
+        """ Return list of mode names supported by the device """
+        result = []
+        for mode_id in self._capabilities["modes"]:
+            if MODES_CONVERTER[mode_id]["name"] not in result:
+                result.append(MODES_CONVERTER[mode_id]["name"])
+        return result
+
+    @property
+    def supported_modes_raw(self):
+        """ Return list of raw modes supported by the device (from API modes bitmask) """
+        return list(self._capabilities["modes"])
+
+    @property
+    def supported_speeds(self):
+        """ Return list of fan speeds supported by the device """
+        return sorted(self._capabilities["speeds"].keys())
+
+    @property
+    def has_vertical_slats(self):
+        """ Return True if vertical slats can be controlled on the device """
+        return len(self._capabilities["vertical_slats"]) > 0
+
+    @property
+    def has_horizontal_slats(self):
+        """ Return True if horizontal slats can be controlled on the device """
+        return len(self._capabilities["horizontal_slats"]) > 0
+
+    @property
+    def supported_vertical_slats(self):
+        """ Return list of vertical slats positions supported by the device """
+        return [self._slats_position(raw) for raw in self._capabilities["vertical_slats"]]
+
+    @property
+    def supported_horizontal_slats(self):
+        """ Return list of horizontal slats positions supported by the device """
+        return [
+            self._slats_position(raw) for raw in self._capabilities["horizontal_slats"]
+        ]
+
     #
     # setters
     #
@@ -180,6 +259,7 @@ class Device:
         _LOGGER.info("call turn_on() on {}".format(self.str_complete))
         self._send_event("P1", 1)
         self._data["power"] = "1"
+        self._api._fleet._index_device(self)
         return True
 
     def turn_off(self):
@@ -187,24 +267,35 @@ class Device:
         _LOGGER.info("call turn_off() on {}".format(self.str_complete))
         self._send_event("P1", 0)
         self._data["power"] = "0"
+        self._api._fleet._index_device(self)
         return True
 
     def set_mode(self, mode_name):
         """ Set mode of the device """
         _LOGGER.info("call set_mode({}) on {}".format(mode_name, self.str_complete))
+        mode_ids = [
+            mode_id
+            for mode_id, mode in MODES_CONVERTER.items()
+            if mode["name"] == mode_name
+        ]
+        if len(mode_ids) == 0:
+            raise ValueError('mode name "{}" not found'.format(mode_name))
         mode_id_found = None
-        for mode_id, mode in MODES_CONVERTER.items():
-            if mode["name"] == mode_name:
+        for mode_id in mode_ids:
+            if mode_id in self._capabilities["modes"]:
                 mode_id_found = mode_id
                 break
         if mode_id_found is None:
-            raise ValueError('mode name "{}" not found'.format(mode_name))
+            raise ValueError(
+                'mode name "{}" not supported by device {}'.format(mode_name, self.name)
+            )
 
         # send event
         self._send_event("P2", mode_id_found)
 
         # update mode
         self._data["mode"] = mode_id_found
+        self._api._fleet._index_device(self)
 
         return True
 
@@ -225,6 +316,69 @@ class Device:
         else:
             self._send_event("P7", temperature)
             self._data["cold_consign"] = str(temperature)
+        self._api._fleet._index_device(self)
+        return True
+
+    def set_speed(self, speed):
+        """ Set fan speed for current heat/cold mode on this device """
+        _LOGGER.info("call set_speed({}) on {}".format(speed, self.str_complete))
+        if self.mode_raw == "5":
+            raise ValueError(
+                'speed can\'t be set in mode "{}" on device {}'.format(
+                    self.mode, self.name
+                )
+            )
+        heat_cold_mode = self._controllable_heat_cold_mode("speed")
+        if isinstance(speed, str) and speed.isdigit():
+            speed = int(speed)
+        if (
+            not isinstance(speed, int)
+            or isinstance(speed, bool)
+            or speed not in self._capabilities["speeds"]
+        ):
+            raise ValueError(
+                'speed "{}" not supported by device {}'.format(speed, self.name)
+            )
+        raw = self._capabilities["speeds"][speed]
+
+        if heat_cold_mode == "heat":
+            self._send_event("P4", raw)
+            self._data["heat_speed"] = str(raw)
+        else:
+            self._send_event("P3", raw)
+            self._data["cold_speed"] = str(raw)
+        return True
+
+    def set_vertical_slats(self, position):
+        """ Set vertical slats position (0 to 4 or "swing") for current heat/cold mode on this device """
+        _LOGGER.info(
+            "call set_vertical_slats({}) on {}".format(position, self.str_complete)
+        )
+        heat_cold_mode = self._controllable_heat_cold_mode("vertical slats")
+        raw = self._slats_raw(position, self._capabilities["vertical_slats"])
+
+        if heat_cold_mode == "heat":
+            self._send_event("P10", raw)
+            self._data["ver_heat_slats"] = raw
+        else:
+            self._send_event("P9", raw)
+            self._data["ver_cold_slats"] = raw
+        return True
+
+    def set_horizontal_slats(self, position):
+        """ Set horizontal slats position (0 to 4 or "swing") for current heat/cold mode on this device """
+        _LOGGER.info(
+            "call set_horizontal_slats({}) on {}".format(position, self.str_complete)
+        )
+        heat_cold_mode = self._controllable_heat_cold_mode("horizontal slats")
+        raw = self._slats_raw(position, self._capabilities["horizontal_slats"])
+
+        if heat_cold_mode == "heat":
+            self._send_event("P20", raw)
+            self._data["hor_heat_slats"] = raw
+        else:
+            self._send_event("P19", raw)
+            self._data["hor_cold_slats"] = raw
         return True
 
     #
@@ -272,9 +426,88 @@ class Device:
         }
         return self._api._send_event(payload)
 
+    def _load_capabilities(self):
+        """ Decode capabilities of the device from its data (modes bitmask, speeds & slats) """
+        modes = self._data.get("modes")
+        if modes:
+            # modes bitmask : nth char set to 1 if mode n+1 is supported
+            mode_ids = [
+                str(index + 1)
+                for index, bit in enumerate(modes)
+                if bit == "1" and str(index + 1) in MODES_CONVERTER
+            ]
+        else:
+            # no bitmask => don't restrict modes
+            mode_ids = [mode_id for mode_id in MODES_CONVERTER if mode_id != "0"]
+
+        if self._data.get("availables_speeds"):
+            speeds = SPEEDS[: int(self._data.get("availables_speeds"))]
+        else:
+            # no speeds count => don't restrict speeds (same as modes)
+            speeds = list(SPEEDS)
+        # speed => raw value sent to API (2 speeds devices use 1 & 3, like the web app)
+        speeds_raw = {speed: speed for speed in speeds}
+        if len(speeds) == 2:
+            speeds_raw[2] = 3
+
+        self._capabilities = {
+            "modes": mode_ids,
+            "speeds": speeds_raw,
+            "speeds_from_raw": {str(raw): speed for speed, raw in speeds_raw.items()},
+            "vertical_slats": self._load_slats_capabilities("ver"),
+            "horizontal_slats": self._load_slats_capabilities("hor"),
+        }
+
+    def _load_slats_capabilities(self, prefix):
+        """ Return list of raw slats positions supported for prefix (ver or hor) """
+        if str(self._data.get("{}_state_slats".format(prefix))) != "1":
+            return []
+        nb_positions = int(self._data.get("{}_position_slats".format(prefix)) or 0)
+        return SLATS_POSITIONS[:nb_positions] + [SLATS_SWING]
+
+    def _controllable_heat_cold_mode(self, setting):
+        """ Return current heat/cold mode or raise ValueError if setting can't be changed in current mode """
+        heat_cold_mode = MODES_CONVERTER.get(self.mode_raw, {}).get("type")
+        if heat_cold_mode not in ("heat", "cold"):
+            raise ValueError(
+                '{} can\'t be set without heat or cold mode on device {}'.format(
+                    setting, self.name
+                )
+            )
+        return heat_cold_mode
+
+    def _slats_position(self, raw):
+        """ Convert raw slats value (from API) to position (0 to 4 or "swing") """
+        if raw == SLATS_SWING:
+            return "swing"
+        if raw in SLATS_POSITIONS:
+            return SLATS_POSITIONS.index(raw)
+        return None
+
+    def _slats_raw(self, position, supported):
+        """ Convert slats position to raw value (for API) and check it's supported """
+        if position == "swing":
+            raw = SLATS_SWING
+        elif (
+            isinstance(position, int)
+            and not isinstance(position, bool)
+            and 0 <= position < len(SLATS_POSITIONS)
+        ):
+            raw = SLATS_POSITIONS[position]
+        else:
+            raw = None
+        if raw is None or raw not in supported:
+            raise ValueError(
+                'slats position "{}" not supported by device {}'.format(
+                    position, self.name
+                )
+            )
+        return raw
+
     def _set_data_refreshed(self, data):
         """ Set data refreshed (call by parent AirzoneCloudDaikin on refresh_devices()) """
         self._data = data
+        self._load_capabilities()
         _LOGGER.info("Data refreshed for {}".format(self.str_complete))
 
 
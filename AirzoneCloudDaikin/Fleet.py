@@ -0,0 +1,313 @@
+import bisect
+import logging
+import math
+from array import array
+from .contants import MODES_CONVERTER
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class Fleet:
+    """Index all devices of an AirzoneCloudDaikin account to query & aggregate them without full scan"""
+
+    INDEXES = ("installation_id", "is_on", "mode", "heat_cold_mode", "status", "time_zone")
+
+    _slots = {}
+    _devices = []
+    _keys = []
+    _free_slots = []
+    _indexes = {}
+    _with_temperature = set()
+    _sorted_deltas = []
+    _current_temperatures = None
+    _target_temperatures = None
+    _temperature_deltas = None
+
+    def __init__(self):
+        self._slots = {}  # device id => slot
+        self._devices = []  # slot => device (None if slot is free)
+        self._keys = []  # slot => indexed values of the device
+        self._free_slots = []
+        self._indexes = {name: {} for name in self.INDEXES}  # name => value => slots
+        self._with_temperature = set()  # slots with current & target temperature
+        self._sorted_deltas = []  # (temperature delta, slot) sorted for range queries
+
+        # columns (one value per slot, nan if unknown)
+        self._current_temperatures = array("d")
+        self._target_temperatures = array("d")
+        self._temperature_deltas = array("d")
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __str__(self):
+        return "Fleet(devices={})".format(len(self))
+
+    #
+    # getters
+    #
+
+    @property
+    def devices(self):
+        """ Return all indexed devices """
+        return [self._devices[slot] for slot in sorted(self._slots.values())]
+
+    def values(self, index_name):
+        """ Return values currently indexed for index_name (installation_id, is_on, mode, ...) """
+        if index_name not in self._indexes:
+            raise ValueError('index "{}" not found'.format(index_name))
+        return list(self._indexes[index_name].keys())
+
+    def count_by(self, index_name):
+        """ Return number of devices by value of index_name : { value: count, ... } """
+        if index_name not in self._indexes:
+            raise ValueError('index "{}" not found'.format(index_name))
+        return {value: len(slots) for value, slots in self._indexes[index_name].items()}
+
+    #
+    # queries
+    #
+
+    def filter(
+        self,
+        min_temperature_delta=None,
+        max_temperature_delta=None,
+        strict=False,
+        **criteria
+    ):
+        """
+        Return devices matching all criteria
+
+        criteria are indexed values (installation_id, is_on, mode, heat_cold_mode, status, time_zone).
+        Temperature delta is current temperature minus target temperature,
+        bounds are included unless strict is True,
+        ex: all heating devices that are on and more than 2°C below target :
+        filter(heat_cold_mode="heat", is_on=True, max_temperature_delta=-2, strict=True)
+        """
+        slots = self._select(
+            min_temperature_delta, max_temperature_delta, strict, criteria
+        )
+        return [self._devices[slot] for slot in sorted(slots)]
+
+    def count(
+        self,
+        min_temperature_delta=None,
+        max_temperature_delta=None,
+        strict=False,
+        **criteria
+    ):
+        """ Return number of devices matching all criteria (same criteria as filter()) """
+        return len(
+            self._select(min_temperature_delta, max_temperature_delta, strict, criteria)
+        )
+
+    def stats(
+        self,
+        min_temperature_delta=None,
+        max_temperature_delta=None,
+        strict=False,
+        **criteria
+    ):
+        """
+        Return aggregates on devices matching all criteria (same criteria as filter()) :
+        { count, temperature_count, <column>_mean, <column>_min, <column>_max }
+        with column in current_temperature, target_temperature & temperature_delta.
+        Temperature aggregates only consider devices with known current & target temperatures
+        """
+        slots = self._select(
+            min_temperature_delta, max_temperature_delta, strict, criteria
+        )
+        slots_with_temperature = slots & self._with_temperature
+
+        result = {
+            "count": len(slots),
+            "temperature_count": len(slots_with_temperature),
+        }
+        for name, column in (
+            ("current_temperature", self._current_temperatures),
+            ("target_temperature", self._target_temperatures),
+            ("temperature_delta", self._temperature_deltas),
+        ):
+            values = self._column(column, slots_with_temperature)
+            result[name + "_mean"] = None
+            result[name + "_min"] = None
+            result[name + "_max"] = None
+            if len(values) > 0:
+                result[name + "_mean"] = math.fsum(values) / len(values)
+                result[name + "_min"] = min(values)
+                result[name + "_max"] = max(values)
+        return result
+
+    #
+    # private
+    #
+
+    def _select(self, min_temperature_delta, max_temperature_delta, strict, criteria):
+        """ Return set of slots matching criteria (intersect indexes from the smallest) """
+        candidates = []
+        for name, value in criteria.items():
+            if name not in self._indexes:
+                raise ValueError('index "{}" not found'.format(name))
+            candidates.append(self._indexes[name].get(value, set()))
+        if min_temperature_delta is not None or max_temperature_delta is not None:
+            candidates.append(
+                self._select_temperature_delta(
+                    min_temperature_delta, max_temperature_delta, strict
+                )
+            )
+
+        if len(candidates) == 0:
+            return set(self._slots.values())
+
+        candidates.sort(key=len)
+        slots = set(candidates[0])
+        for candidate in candidates[1:]:
+            if not slots:
+                break
+            slots &= candidate
+        return slots
+
+    def _select_temperature_delta(
+        self, min_temperature_delta, max_temperature_delta, strict
+    ):
+        """ Return set of slots with temperature delta between bounds (bisect on sorted deltas) """
+        start = 0
+        end = len(self._sorted_deltas)
+        if min_temperature_delta is not None:
+            bound = float(min_temperature_delta)
+            if strict:
+                start = bisect.bisect_right(self._sorted_deltas, (bound, math.inf))
+            else:
+                start = bisect.bisect_left(self._sorted_deltas, (bound, -1))
+        if max_temperature_delta is not None:
+            bound = float(max_temperature_delta)
+            if strict:
+                end = bisect.bisect_left(self._sorted_deltas, (bound, -1))
+            else:
+                end = bisect.bisect_right(self._sorted_deltas, (bound, math.inf))
+        return {slot for _, slot in self._sorted_deltas[start:end]}
+
+    def _column(self, column, slots):
+        """ Return values of column for slots (slots must have known values) """
+        if len(slots) == len(column):
+            # every slot selected : use column as is
+            return column
+        return array("d", map(column.__getitem__, slots))
+
+    def _update_devices(self, installation, devices):
+        """ Merge devices of an installation (call by Installation on devices load/refresh) """
+        device_ids = set()
+        for device in devices:
+            device_ids.add(device.id)
+            self._index_device(device)
+
+        # remove devices which are no longer in installation
+        for slot in list(self._indexes["installation_id"].get(installation.id, set())):
+            if self._devices[slot].id not in device_ids:
+                self._remove_slot(slot)
+
+    def _remove_installations(self, installation_ids_kept):
+        """ Remove devices of installations not in installation_ids_kept (call by AirzoneCloudDaikin on refresh) """
+        installation_ids_kept = set(installation_ids_kept)
+        for installation_id, slots in list(self._indexes["installation_id"].items()):
+            if installation_id not in installation_ids_kept:
+                for slot in list(slots):
+                    self._remove_slot(slot)
+
+    def _index_device(self, device):
+        """ Add or update a device in indexes & columns (only changed index values are moved) """
+        keys = self._device_keys(device)
+        slot = self._slots.get(device.id)
+
+        if slot is None:
+            slot = self._new_slot(device)
+            for name, value in keys.items():
+                self._indexes[name].setdefault(value, set()).add(slot)
+        else:
+            self._devices[slot] = device
+            old_keys = self._keys[slot]
+            for name, value in keys.items():
+                if old_keys[name] != value:
+                    self._discard_from_index(name, old_keys[name], slot)
+                    self._indexes[name].setdefault(value, set()).add(slot)
+        self._keys[slot] = keys
+
+        # columns
+        current_temperature = self._to_float(device.current_temperature)
+        if keys["heat_cold_mode"] == "heat":
+            target_temperature = self._to_float(device.target_temperature_heat)
+        else:
+            target_temperature = self._to_float(device.target_temperature_cold)
+        self._current_temperatures[slot] = current_temperature
+        self._target_temperatures[slot] = target_temperature
+        self._set_temperature_delta(slot, current_temperature - target_temperature)
+
+    def _set_temperature_delta(self, slot, delta):
+        """ Update temperature delta of slot in column & sorted deltas (nan if unknown) """
+        old_delta = self._temperature_deltas[slot]
+        if old_delta == delta:
+            return
+        if not math.isnan(old_delta):
+            index = bisect.bisect_left(self._sorted_deltas, (old_delta, slot))
+            del self._sorted_deltas[index]
+        self._temperature_deltas[slot] = delta
+        if math.isnan(delta):
+            self._with_temperature.discard(slot)
+        else:
+            bisect.insort(self._sorted_deltas, (delta, slot))
+            self._with_temperature.add(slot)
+
+    def _new_slot(self, device):
+        """ Reserve a slot for a new device """
+        if self._free_slots:
+            slot = self._free_slots.pop()
+            self._devices[slot] = device
+        else:
+            slot = len(self._devices)
+            self._devices.append(device)
+            self._keys.append(None)
+            self._current_temperatures.append(math.nan)
+            self._target_temperatures.append(math.nan)
+            self._temperature_deltas.append(math.nan)
+        self._slots[device.id] = slot
+        return slot
+
+    def _remove_slot(self, slot):
+        """ Remove device at slot from indexes & columns """
+        device = self._devices[slot]
+        for name, value in self._keys[slot].items():
+            self._discard_from_index(name, value, slot)
+        self._current_temperatures[slot] = math.nan
+        self._target_temperatures[slot] = math.nan
+        self._set_temperature_delta(slot, math.nan)
+        self._devices[slot] = None
+        self._keys[slot] = None
+        del self._slots[device.id]
+        self._free_slots.append(slot)
+        _LOGGER.debug("Device {} removed from fleet".format(device.id))
+
+    def _discard_from_index(self, name, value, slot):
+        """ Remove slot from index name for value (and drop value if no more slots) """
+        self._indexes[name][value].discard(slot)
+        if not self._indexes[name][value]:
+            del self._indexes[name][value]
+
+    def _device_keys(self, device):
+        """ Return indexed values of a device """
+        mode = MODES_CONVERTER.get(device.mode_raw, {})
+        return {
+            "installation_id": device.installation.id,
+            "is_on": device.is_on,
+            "mode": mode.get("name"),
+            "heat_cold_mode": mode.get("type"),
+            "status": device.status,
+            "time_zone": device.time_zone,
+        }
+
+    @staticmethod
+    def _to_float(value):
+        """ Convert value from API to float (nan if unknown) """
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return math.nan
@@ -114,6 +114,8 @@ class Installation:
                 if device is None:
                     device = Device(self._api, self, device_data)
                 self._devices.append(device)
+            # update fleet indexes with loaded devices
+            self._api._fleet._update_devices(self, self._devices)
         except RuntimeError:
             raise Exception(
                 "Unable to load devices of installation {} ({}) from AirzoneCloudDaikin".format(
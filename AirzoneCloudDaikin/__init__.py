@@ -1,3 +1,6 @@
 from .AirzoneCloudDaikin import AirzoneCloudDaikin
 from .Device import Device
 from .Installation import Installation
+from .Fleet import Fleet
+from .AirzoneCloudDaikinDaemon import AirzoneCloudDaikinDaemon
+from .AirzoneCloudDaikinProxy import AirzoneCloudDaikinProxy
@@ -24,3 +24,14 @@ MODES_CONVERTER = {
         "description": "Ventilation in heating mode",
     },
 }
+
+# fan speeds (web app velocities), only the first availables_speeds are available on a device
+SPEEDS = [1, 2, 3, 4, 5]
+
+# slats positions (ver_*_slats / hor_*_slats values), only the first
+# ver_position_slats / hor_position_slats positions are available on a device
+SLATS_POSITIONS = ["0000", "0001", "0010", "0011", "0100"]
+SLATS_SWING = "0111"
+
+# header used by AirzoneCloudDaikinProxy to authenticate to AirzoneCloudDaikinDaemon
+DAEMON_SECRET_HEADER = "X-AirzoneCloudDaikin-Secret"